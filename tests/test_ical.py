@@ -1,3 +1,5 @@
+import io
+import json
 from datetime import datetime, timedelta
 
 import pytest
@@ -6,7 +8,7 @@ from icalendar import vCalAddress, vText
 
 from xmaintnote.event import XMaintNoteEvent
 from xmaintnote.exc import PropertyError
-from xmaintnote.util import display
+from xmaintnote.util import display, ical2json, ical2json_stream
 
 
 def roundTime(dt=None, roundTo=60):
@@ -125,3 +127,39 @@ def test_maint_status_bad_logs():
     bad_status = 'TINNITUS'
     with pytest.raises(PropertyError):
         event.add('x-maintnote-status', bad_status)
+
+
+def test_ical2json_multiple_events():
+    cal = Calendar()
+    cal.add('version', '2.0')
+    for maint_id in ('WorkOrder-1', 'WorkOrder-2'):
+        event = XMaintNoteEvent()
+        event.add('x-maintnote-maintenance-id', maint_id)
+        cal.add_component(event)
+
+    data = json.loads(ical2json(cal))
+    events = data['VCALENDAR']['VEVENT']
+    assert data['VCALENDAR']['VERSION'] == '2.0'
+    assert [e['X-MAINTNOTE-MAINTENANCE-ID'] for e in events] == [
+        'WorkOrder-1',
+        'WorkOrder-2',
+    ]
+
+
+def test_ical2json_stream_matches_dumps():
+    cal = Calendar()
+    cal.add('version', '2.0')
+    event = XMaintNoteEvent()
+    event.add('sequence', 1)
+    event.add('x-maintnote-impact', 'OUTAGE')
+    cal.add_component(event)
+
+    fp = io.StringIO()
+    ical2json_stream(cal, fp)
+    expected = {
+        'VCALENDAR': {
+            'VERSION': '2.0',
+            'VEVENT': [{'SEQUENCE': 1, 'X-MAINTNOTE-IMPACT': 'OUTAGE'}],
+        },
+    }
+    assert fp.getvalue() == json.dumps(expected, sort_keys=True, indent=4)
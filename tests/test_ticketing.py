@@ -0,0 +1,296 @@
+import gc
+import re
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from jira import JIRAError
+
+from xmaintnote.event import XMaintNoteEvent
+from xmaintnote.ticketing import JiraTicket, Ticket
+
+
+class DummyTicket(Ticket):
+    def create(self):
+        return True
+
+    def close(self):
+        return True
+
+    def exists(self):
+        return False
+
+
+class FakeIssue(object):
+    def __init__(self, key, labels):
+        self.key = key
+        self.fields = SimpleNamespace(labels=labels)
+
+
+class FakeJira(object):
+    """Stand-in for jira.JIRA recording the calls made to it"""
+
+    def __init__(self, url=None, basic_auth=None):
+        self.url = url
+        self.basic_auth = basic_auth
+        self.issues = []
+        self.searches = []
+        self.created = []
+        self.watchers = []
+        self.transitioned = []
+        self.transition_calls = 0
+        self.transition_list = [{'id': '31', 'name': 'Done'}]
+
+    def add_issue(self, *labels):
+        issue = FakeIssue('MAINT-{}'.format(len(self.issues) + 1), labels)
+        self.issues.append(issue)
+        return issue
+
+    def search_issues(self, jql, fields=None, maxResults=50):
+        self.searches.append(jql)
+        labels = {
+            re.sub(r'\\(.)', r'\1', label)
+            for label in re.findall(r'"((?:[^"\\]|\\.)*)"', jql)
+        }
+        found = [
+            i for i in self.issues if labels.intersection(i.fields.labels)
+        ]
+        if maxResults is not False:
+            found = found[:maxResults]
+        return found
+
+    def create_issue(self, fields):
+        self.created.append(fields)
+        return self.add_issue(*fields['labels'])
+
+    def add_watcher(self, issue, watcher):
+        self.watchers.append((issue.key, watcher))
+
+    def transitions(self, issue):
+        self.transition_calls += 1
+        return list(self.transition_list)
+
+    def transition_issue(self, issue, transition):
+        if transition not in {t['id'] for t in self.transition_list}:
+            raise JIRAError(status_code=400, text='Invalid transition')
+        self.transitioned.append((issue.key, transition))
+
+
+@pytest.fixture(autouse=True)
+def fake_jira(monkeypatch):
+    monkeypatch.setattr('jira.JIRA', FakeJira)
+    JiraTicket.clear_cache()
+
+
+def make_event(maintenance_id='WorkOrder-31415', impact='NO-IMPACT'):
+    event = XMaintNoteEvent()
+    event.add('dtstart', datetime(2016, 6, 12, 21, 0, 0))
+    event.add('dtend', datetime(2016, 6, 12, 22, 0, 0))
+    event.add('x-maintnote-provider', 'example.com')
+    event.add('x-maintnote-account', '137.035999173')
+    event.add('x-maintnote-maintenance-id', maintenance_id)
+    event.add('x-maintnote-object-id', 'acme-widgets-as-a-service')
+    event.add('x-maintnote-impact', impact)
+    return event
+
+
+def test_ticket_is_abstract():
+    with pytest.raises(TypeError):
+        Ticket(make_event())
+
+
+def test_ticket_key_and_title():
+    tkt = DummyTicket(make_event())
+    assert tkt.key == 'example.com:137.035999173:WorkOrder-31415'
+    assert tkt.title == 'example.com NO-IMPACT Maintenance for 137.035999173'
+    assert 'Start time: 2016-06-12 21:00:00' in tkt.body
+
+
+def test_ticket_key_is_shared():
+    first = DummyTicket(make_event())
+    second = DummyTicket(make_event())
+    assert first.key is second.key
+    assert first.provider is second.provider
+
+
+def test_bulk_exists_maps_issues_to_tickets():
+    tickets = [JiraTicket(make_event('WorkOrder-{}'.format(i)))
+               for i in range(5)]
+    jira = tickets[0].jira
+    issue = jira.add_issue(tickets[3].key)
+
+    existing = JiraTicket.bulk_exists(jira, tickets, chunk_size=2)
+
+    assert existing == {tickets[3].key: issue}
+    assert len(jira.searches) == 3
+    assert [tkt.ticket for tkt in tickets] == [None, None, None, issue, None]
+
+
+def test_exists_uses_bulk_results():
+    tickets = [JiraTicket(make_event('WorkOrder-{}'.format(i)))
+               for i in range(2)]
+    jira = tickets[0].jira
+    jira.add_issue(tickets[0].key)
+    JiraTicket.bulk_exists(jira, tickets)
+    searches = len(jira.searches)
+
+    assert tickets[0].exists()
+    assert not tickets[1].exists()
+    assert tickets[1].create()
+    assert len(jira.searches) == searches
+
+
+def test_bulk_exists_duplicate_keys_create_once():
+    tickets = [JiraTicket(make_event()), JiraTicket(make_event())]
+    jira = tickets[0].jira
+    JiraTicket.bulk_exists(jira, tickets)
+
+    assert tickets[0].create()
+    assert not tickets[1].create()
+    assert len(jira.created) == 1
+    assert tickets[1].ticket is tickets[0].ticket
+
+
+def test_bulk_exists_fetches_past_max_results():
+    first = JiraTicket(make_event('WorkOrder-1'))
+    second = JiraTicket(make_event('WorkOrder-2'))
+    jira = first.jira
+    for _ in range(3):
+        jira.add_issue(first.key)
+    issue = jira.add_issue(second.key)
+
+    existing = JiraTicket.bulk_exists(jira, [first, second])
+
+    assert existing[second.key] is issue
+    assert second.ticket is issue
+
+
+@pytest.mark.parametrize('watchers', [['noc'], ['noc', 'ops', 'oncall']])
+def test_create_adds_watchers(watchers):
+    tkt = JiraTicket(make_event(), watchers=watchers)
+    assert tkt.create()
+    assert sorted(tkt.jira.watchers) == sorted(
+        (tkt.ticket.key, w) for w in watchers
+    )
+
+
+def test_create_maps_impact_to_priority():
+    tkt = JiraTicket(make_event(impact='DEGRADED'))
+    tkt.create()
+    assert tkt.jira.created[-1]['priority'] == {'name': 'High'}
+
+
+def test_create_unknown_impact_uses_outage_priority():
+    tkt = JiraTicket(make_event(impact='GARBAGE'))
+    tkt.create()
+    assert tkt.jira.created[-1]['priority'] == {'name': 'Highest'}
+
+
+def test_pri_mapping_without_outage_raises():
+    tkt = JiraTicket(make_event(impact='GARBAGE'),
+                     pri_mapping={'NO-IMPACT': {'name': 'Low'}})
+    with pytest.raises(KeyError):
+        tkt.create()
+
+
+def test_exists_quotes_label():
+    tkt = JiraTicket(make_event('Work "Order" \\ 1'))
+    issue = tkt.jira.add_issue(tkt.key)
+
+    assert tkt.exists()
+    assert tkt.ticket is issue
+    assert tkt.jira.searches == [
+        r'labels = "example.com:137.035999173:Work \"Order\" \\ 1"'
+    ]
+    assert not hasattr(DummyTicket(make_event()), '_label_jql')
+
+
+def test_bulk_exists_quotes_labels():
+    tkt = JiraTicket(make_event('Work "Order" 2'))
+    issue = tkt.jira.add_issue(tkt.key)
+    JiraTicket.bulk_exists(tkt.jira, [tkt])
+    assert tkt.ticket is issue
+    assert r'\"Order\"' in tkt.jira.searches[0]
+
+
+def test_exists_warns_on_multiple_matches(caplog):
+    tkt = JiraTicket(make_event())
+    first = tkt.jira.add_issue(tkt.key)
+    tkt.jira.add_issue(tkt.key)
+
+    assert tkt.exists()
+    assert tkt.ticket is first
+    assert 'Multiple issues found' in caplog.text
+
+
+def test_close_caches_transitions():
+    tickets = [JiraTicket(make_event('WorkOrder-{}'.format(i)))
+               for i in range(2)]
+    jira = tickets[0].jira
+    for tkt in tickets:
+        jira.add_issue(tkt.key)
+        tkt.close()
+
+    assert jira.transition_calls == 1
+    assert [t for _, t in jira.transitioned] == ['31', '31']
+
+
+def test_close_refetches_rejected_transition():
+    first = JiraTicket(make_event('WorkOrder-1'))
+    second = JiraTicket(make_event('WorkOrder-2'))
+    jira = first.jira
+    jira.add_issue(first.key)
+    jira.add_issue(second.key)
+    first.close()
+
+    jira.transition_list = [{'id': '41', 'name': 'Done'}]
+    second.close()
+
+    assert jira.transition_calls == 2
+    assert jira.transitioned[-1] == (second.ticket.key, '41')
+
+
+def test_close_unknown_transition_raises():
+    tkt = JiraTicket(make_event(), finished_transition='Resolved')
+    tkt.jira.add_issue(tkt.key)
+    with pytest.raises(ValueError):
+        tkt.close()
+
+
+def test_close_missing_issue():
+    assert JiraTicket(make_event()).close() is False
+
+
+def test_client_shared_by_credentials():
+    first = JiraTicket(make_event(), username='admin', password='admin')
+    second = JiraTicket(make_event(), username='admin', password='admin')
+    anonymous = JiraTicket(make_event(), username='admin')
+
+    assert first.jira is second.jira
+    assert anonymous.jira is not first.jira
+    assert anonymous.jira.basic_auth is None
+
+
+def test_client_dropped_with_last_ticket():
+    tkt = JiraTicket(make_event(), username='admin', password='admin')
+    assert len(JiraTicket._client_cache) == 1
+
+    del tkt
+    gc.collect()
+    assert len(JiraTicket._client_cache) == 0
+
+
+def test_clear_cache():
+    first = JiraTicket(make_event())
+    JiraTicket.clear_cache()
+    second = JiraTicket(make_event())
+    assert first.jira is not second.jira
+
+
+def test_ticket_title_and_body_assignable():
+    tkt = DummyTicket(make_event())
+    tkt.title = 'Custom title'
+    tkt.body = 'Custom body'
+    assert tkt.title == 'Custom title'
+    assert tkt.body == 'Custom body'
@@ -1,3 +1,3 @@
 # set properties
-import xmaintnote.prop
+import xmaintnote.prop  # noqa: F401
 # from xmaintnote.event import XMaintNoteEvent
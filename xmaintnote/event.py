@@ -6,7 +6,7 @@ from xmaintnote import exc
 class XMaintNoteEvent(Event):
     # XXX-kbaker
     # controls ordering - probably not necessary
-    # and can probably get rid of this class entirely 
+    # and can probably get rid of this class entirely
     # besides canonical_order the library doesn't seem
     # to use any of this anyways.
     canonical_order = Event.canonical_order + (
@@ -43,5 +43,6 @@ class XMaintNoteEvent(Event):
 
     def add(self, name, value, **kwargs):
         if name.upper() in self.singletons and name in self:
-            raise exc.PropertyError('Multiple values supplied for singleton property %r' % name)
+            raise exc.PropertyError(
+                'Multiple values supplied for singleton property %r' % name)
         super(XMaintNoteEvent, self).add(name, value, **kwargs)
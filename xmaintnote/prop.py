@@ -12,35 +12,37 @@ LOGGER = logging.getLogger(__name__)
 class vXMaintNoteImpact(vText):
     """X-MAINTNOTE-IMPACT"""
     property_name = 'x-maintnote-impact'
-    # list of known impact types
-    impact_types = [
+    # set of known impact types
+    impact_types = frozenset({
         'NO-IMPACT',
         'REDUCED-REDUNDANCY',
         'DEGRADED',
         'OUTAGE'
-    ]
+    })
 
     def __init__(self, *args, **kwargs):
-        if str(self) not in self.impact_types:
+        val = str(self)
+        if val not in self.impact_types:
             LOGGER.error(
                 'Unrecognised impact type %r should be treated as OUTAGE',
-                str(self))
+                val)
 
 
 @register_property
 class vXMaintNoteStatus(vText):
     """X-MAINTNOTE-STATUS"""
     property_name = 'x-maintnote-status'
-    allowed_values = (
+    allowed_values = frozenset({
         'TENTATIVE',
         'CONFIRMED',
         'CANCELLED',
         'IN-PROCESS',
         'COMPLETED',
-    )
+    })
 
     def __init__(self, *args, **kwargs):
-        if str(self) not in self.allowed_values:
+        val = str(self)
+        if val not in self.allowed_values:
             LOGGER.error('Encountered non-standard %s status value %s',
-                         self.property_name, str(self))
-            raise PropertyError()
\ No newline at end of file
+                         self.property_name, val)
+            raise PropertyError()
@@ -11,12 +11,43 @@ A base class, Ticket, is provided to do some boiler plate things and enforce a
 consistent interface.
 """
 
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from sys import intern
 from textwrap import dedent
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
-from jira import JIRA
+LOGGER = logging.getLogger(__name__)
 
+_TITLE_TEMPLATE = '{provider} {impact} Maintenance for {account}'
+_BODY_TEMPLATE = dedent('''
+    {provider} is having a maintenance of {impact}. Affected account number
+    is {account}.
 
-class Ticket(object):
+    Start time: {start_time}
+    End time: {end_time}
+    Impact: {impact}
+    Account: {account}
+    ''')
+
+
+def _jql_quote(value):
+    """Return value as a double-quoted JQL string literal"""
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"')
+    return '"{}"'.format(escaped)
+
+
+class _PriMap(dict):
+    """Priority mapping that treats unrecognised impacts as OUTAGE"""
+
+    def __missing__(self, key):
+        if key == 'OUTAGE':
+            raise KeyError(key)
+        return self['OUTAGE']
+
+
+class Ticket(ABC):
     """Base class for a ticket
 
     Purpose of this is to provide standard methods for retrieving duplicates,
@@ -34,8 +65,10 @@ class Ticket(object):
         provider (str)
         key (str): String that can try to be used to be unique among
                    maintenances
-        title (str): Generated title that may be used as a ticket title
-        body (str): Generated body thath may be used as a ticket description
+        title (str): Generated title that may be used as a ticket title.
+            Built on first access, may be overridden by assignment
+        body (str): Generated body thath may be used as a ticket description.
+            Built on first access, may be overridden by assignment
         ticket: Optional to add by subclass, instance of ticket in the ticket
             system
     """
@@ -55,61 +88,84 @@ class Ticket(object):
         Args:
             event (XMaintNoteEvent): Maintenance Event
         """
+        # Pull every property off the event up front into locals. The key
+        # parts are interned as they repeat across events of a calendar.
+        g = event.__getitem__
+        account = intern(str(g('X-MAINTNOTE-ACCOUNT')))
+        impact = g('X-MAINTNOTE-IMPACT')
+        maintenance_id = intern(str(g('X-MAINTNOTE-MAINTENANCE-ID')))
+        object_id = g('X-MAINTNOTE-OBJECT-ID')
+        provider = intern(str(g('X-MAINTNOTE-PROVIDER')))
+
         self.event = event
-        self.account = event['X-MAINTNOTE-ACCOUNT']
-        self.impact = event['X-MAINTNOTE-IMPACT']
-        self.maintenance_id = event['X-MAINTNOTE-MAINTENANCE-ID']
-        self.object_id = event['X-MAINTNOTE-OBJECT-ID']
-        self.provider = event['X-MAINTNOTE-PROVIDER']
+        self.account = account
+        self.impact = impact
+        self._impact_key = str(impact)
+        self.maintenance_id = maintenance_id
+        self.object_id = object_id
+        self.provider = provider
         self.ticket = None
 
-        factors = [
-            self.provider,
-            self.account,
-            self.maintenance_id,
-        ]
-
-        self.key = '{}:{}:{}'.format(*factors)
-
-        self.title = '{provider} {impact} Maintenance for {account}'.format(
-            provider=self.provider,
-            impact=self.impact,
-            account=self.account,
-        )
-
-        body = '''
-        {provider} is having a maintenance of {impact}. Affected account number
-        is {account}.
-
-        Start time: {start_time}
-        End time: {end_time}
-        Impact: {impact}
-        Account: {account}
-        '''.format(
-            provider=self.provider,
-            impact=self.impact,
-            account=self.account,
-            start_time=str(event['DTSTART'].dt),
-            end_time=str(event['DTEND'].dt),
-        )
-        self.body = dedent(body)
+        self.key = intern(f'{provider}:{account}:{maintenance_id}')
+
+        # Rendered on first access, see the title and body properties
+        self._title = None
+        self._body = None
 
         self._post_init(**kwargs)
 
+    @property
+    def title(self):
+        """Generated title, built on first access"""
+        if self._title is None:
+            self._title = _TITLE_TEMPLATE.format(
+                provider=self.provider,
+                impact=self.impact,
+                account=self.account,
+            )
+        return self._title
+
+    @title.setter
+    def title(self, value):
+        self._title = value
+
+    @property
+    def body(self):
+        """Generated body, built on first access"""
+        if self._body is None:
+            event = self.event
+            start_time = str(event['DTSTART'].dt)
+            end_time = str(event['DTEND'].dt)
+            self._body = _BODY_TEMPLATE.format(
+                provider=self.provider,
+                impact=self.impact,
+                account=self.account,
+                start_time=start_time,
+                end_time=end_time,
+            )
+        return self._body
+
+    @body.setter
+    def body(self, value):
+        self._body = value
+
     def _post_init(self, **kwargs):
         pass
 
+    @abstractmethod
     def create(self):
         """Overload to create a ticket in the system"""
-        raise NotImplemented('Subclass must overload this method')
+        ...
 
+    @abstractmethod
     def close(self):
         """Overload to close a ticket in the system"""
-        raise NotImplemented('Subclass must overload this method')
+        ...
 
+    @abstractmethod
     def exists(self):
         """Overload to determine if this event exists in ticket form already"""
-        raise NotImplemented('Subclass must overload this method')
+        ...
 
 
 class JiraTicket(Ticket):
@@ -148,12 +204,28 @@ class JiraTicket(Ticket):
         <JIRA Issue: key=u'MAINT-14', id=u'10013'>
         >>> tkt.impact
         vText('NO-IMPACT')
-        >>> tkt.ticket.fields.priority
+        >>> tkt.jira.issue(tkt.ticket.key).fields.priority
         <JIRA Priority: name=u'Low', id=u'4'>
         >>> tkt.ticket.fields.labels
         [u'example.com:137.035999173:WorkOrder-31415']
     """
 
+    # JIRA clients shared between tickets, keyed by (url, basic_auth). Held
+    # weakly so a client and its credentials go away with its last ticket.
+    _client_cache = WeakValueDictionary()
+    # Per client, transition name to id maps keyed by (project, issuetype)
+    _transition_cache = WeakKeyDictionary()
+
+    @classmethod
+    def clear_cache(cls):
+        """Drop all shared JIRA clients and cached transitions
+
+        Tickets already created keep their client; new tickets get a fresh
+        one.
+        """
+        cls._client_cache.clear()
+        cls._transition_cache.clear()
+
     def _post_init(
             self,
             url='http://localhost:8080',
@@ -170,6 +242,11 @@ class JiraTicket(Ticket):
         If username or password aren't provided, will attempt to do actions as
         anonymous
 
+        Tickets created with the same url and credentials share one JIRA
+        client, and with it the HTTP session and its connection pool. Pass a
+        different username to get a separate client. The client is kept only
+        while a ticket references it; use ``clear_cache`` to drop it sooner.
+
         Args:
             url (str): URL to jira server. MUST have the URL scheme (http://)
             username (str): Username (if applicable)
@@ -180,8 +257,11 @@ class JiraTicket(Ticket):
             finished_transition (str): Transition to move the issue into when
                 calling the ``.close`` method. Default: Done
             pri_mapping (str): Map of maintenance impact name to JIRA priority
-                dict. eg, {'NO-IMPACT': {'name': 'Low'}}
+                dict. eg, {'NO-IMPACT': {'name': 'Low'}}. Unrecognised impacts
+                use the priority mapped for OUTAGE
         """
+        # Imported here so using Ticket without JIRA doesn't pay for it
+        from jira import JIRA
 
         # If either part of the credential tuple is unprovided, default to
         # anonymous
@@ -201,26 +281,89 @@ class JiraTicket(Ticket):
                 'OUTAGE': {'name': 'Highest'},
             }
 
-        self.jira = JIRA(url, basic_auth=basic_auth)
+        client_key = (url, basic_auth)
+        jira = self._client_cache.get(client_key)
+        if jira is None:
+            jira = JIRA(url, basic_auth=basic_auth)
+            self._client_cache[client_key] = jira
+
+        self.jira = jira
         self.project = project
         self.issuetype = issuetype
         self.finished_transition = finished_transition
         self.watchers = watchers
-        self.pri_mapping = pri_mapping
+        self.pri_mapping = _PriMap(pri_mapping)
+        self._label_jql = 'labels = {}'.format(_jql_quote(self.key))
+        self._exists_cache = None
 
-    def exists(self):
+    @classmethod
+    def bulk_exists(cls, jira, tickets, chunk_size=50):
+        """Look up existing issues for many tickets with batched queries
+
+        Instead of one label search per ticket, the keys are grouped into
+        ``labels in (...)`` queries of at most ``chunk_size`` labels each to
+        stay under JIRA's URL length limit. The results are stored on every
+        ticket so later calls to ``exists`` (including the one inside
+        ``create``) don't go back to the server.
+
+        Args:
+            jira (JIRA): Client to run the searches with
+            tickets (list): JiraTicket instances to look up
+            chunk_size (int): Maximum number of labels per query
+
+        Returns:
+            existing (dict): Map of ticket key to the matching JIRA issue, for
+                keys that already have an issue
+        """
+        tickets = list(tickets)
+        existing = {}
+        for i in range(0, len(tickets), chunk_size):
+            chunk = tickets[i:i + chunk_size]
+            keys = {tkt.key for tkt in chunk}
+            jql = 'labels in ({})'.format(
+                ','.join(_jql_quote(key) for key in keys)
+            )
+            # Fetch every match; a label carried by several issues must not
+            # push other labels' issues out of a capped result page
+            issues = jira.search_issues(
+                jql, fields='labels', maxResults=False)
+            for issue in issues:
+                for label in keys.intersection(issue.fields.labels):
+                    existing.setdefault(label, issue)
+
+        for tkt in tickets:
+            tkt.ticket = existing.get(tkt.key)
+            tkt._exists_cache = existing
+        return existing
+
+    def exists(self, _cache=None):
         """Return bool for whether maintenance issue exists for this event
 
-        Improvements: Currently not handling the case where multiple issues are
-        returned which may hint that the key used isn't unique enough or people
-        have manually added the same label to other things. Also no exception
+        Only the labels field of the matching issue is fetched. If more than
+        one issue carries the label, which may hint that the key used isn't
+        unique enough or people have manually added the same label to other
+        things, a warning is logged and the first one is used. No exception
         handling mostly because the exception return by JIRA is pretty
         descriptive
 
+        Args:
+            _cache (dict): Precomputed map of ticket key to issue, as returned
+                by ``bulk_exists``. Defaults to the results stored on this
+                ticket by ``bulk_exists``, if any. When set, no search is made.
+
         Returns:
             exists (bool)
         """
-        existing = self.jira.search_issues('labels = {}'.format(self.key))
+        if _cache is None:
+            _cache = self._exists_cache
+        if _cache is not None:
+            self.ticket = _cache.get(self.key)
+            return self.ticket is not None
+
+        existing = self.jira.search_issues(
+            self._label_jql, fields='labels', maxResults=2)
+        if len(existing) > 1:
+            LOGGER.warning('Multiple issues found with label %r', self.key)
         if existing:
             self.ticket = existing[0]
         return True if existing else False
@@ -245,12 +388,16 @@ class JiraTicket(Ticket):
                 'labels': [self.key],
                 'description': self.body,
                 'issuetype': {'name': self.issuetype},
-                'priority': self.pri_mapping[self.impact],
+                'priority': self.pri_mapping[self._impact_key],
             }
             new_issue = jira.create_issue(fields=options)
 
+            # Record the issue in the batched lookup shared with the other
+            # tickets so a later ticket with the same key sees it
+            if self._exists_cache is not None:
+                self._exists_cache[self.key] = new_issue
             self.ticket = new_issue
-            [self._add_watcher(new_issue, w) for w in self.watchers]
+            self._add_watchers(new_issue)
             return True
         else:
             return False
@@ -266,25 +413,67 @@ class JiraTicket(Ticket):
         jira = self.jira
         finished_transition = self.finished_transition
         if self.exists():
-            # Fetch the transitions that we can put the current issue into.
-            # Search through these for the provided ``finished_transition``
-            # from init. If not found, raise error.
-            tkt = self.ticket
-            transitions = jira.transitions(tkt)
-            transition_ids = [
-                t['id'] for t in transitions
-                if t['name'] == self.finished_transition
-            ]
-            if not transition_ids:
-                raise ValueError(
-                    'Transition "{}" not found'.format(finished_transition)
-                )
+            # Look up the provided ``finished_transition`` from init in the
+            # transitions cached for this workflow. Available transitions
+            # depend on the issue's status, so if the cached id is missing or
+            # rejected, fetch the transitions that we can put the current
+            # issue into and try again.
+            from jira import JIRAError
 
-            t = transition_ids[0]
+            tkt = self.ticket
+            workflows = self._transition_cache.setdefault(jira, {})
+            cache_key = (self.project, self.issuetype)
+            t = workflows.get(cache_key, {}).get(finished_transition)
+            if t is not None:
+                try:
+                    jira.transition_issue(tkt, t)
+                except JIRAError:
+                    workflows.pop(cache_key, None)
+                else:
+                    return
+
+            t = self._fetch_transition(tkt, workflows, cache_key)
             jira.transition_issue(tkt, t)
         else:
             return False
 
+    def _fetch_transition(self, issue, workflows, cache_key):
+        """Fetch and cache transitions for issue, return the finishing one
+
+        If not found, raise error.
+        """
+        transitions = self.jira.transitions(issue)
+        # Reversed so the first transition with a given name wins
+        transition_map = {
+            tr['name']: tr['id'] for tr in reversed(transitions)
+        }
+        workflows[cache_key] = transition_map
+        t = transition_map.get(self.finished_transition)
+        if t is None:
+            raise ValueError(
+                'Transition "{}" not found'.format(self.finished_transition)
+            )
+        return t
+
+    def _add_watchers(self, issue):
+        """Add all watchers to issue
+
+        Each watcher is a separate request, so with more than one they are
+        sent in parallel from a small thread pool.
+        """
+        watchers = self.watchers
+        if len(watchers) <= 1:
+            for w in watchers:
+                self._add_watcher(issue, w)
+            return
+
+        with ThreadPoolExecutor(max_workers=min(8, len(watchers))) as pool:
+            futures = [
+                pool.submit(self._add_watcher, issue, w) for w in watchers
+            ]
+        for future in futures:
+            future.result()
+
     def _add_watcher(self, issue, watcher):
         """Add watcher to issue"""
         self.jira.add_watcher(issue, watcher)
@@ -1,7 +1,12 @@
+import io
 import json
 
 import icalendar
 
+# Property registry shared with icalendar's parser
+_TYPES_FACTORY = icalendar.cal.types_factory
+_TYPES_MAP = _TYPES_FACTORY.types_map
+
 
 def encode_vDDDTypes(obj):
     """Convert vDDDTypes - date/time types to strings."""
@@ -10,20 +15,55 @@ def encode_vDDDTypes(obj):
     raise TypeError(repr(obj) + " is not JSON serializable")
 
 
-def ical2json(cal):
-    data = {cal.name: dict(cal.items())}
+def _write_encoded(fp, encoder, obj, level):
+    """Write obj as JSON to fp, indented to sit at the given nesting level"""
+    newline = '\n' + ' ' * (encoder.indent * level)
+    for chunk in encoder.iterencode(obj):
+        fp.write(chunk.replace('\n', newline))
+
+
+def ical2json_stream(cal, fp):
+    """Write cal as JSON to the file-like object fp
 
+    Output is the same as ``ical2json`` but each component is encoded and
+    written on its own, so the whole document is never held in memory.
+    """
+    encoder = json.JSONEncoder(
+        default=encode_vDDDTypes, sort_keys=True, indent=4)
+    pad = ' ' * encoder.indent
+
+    props = dict(cal.items())
+    groups = {}
     for component in cal.subcomponents:
-        if component.name not in data[cal.name]:
-            data[cal.name][component.name] = []
+        groups.setdefault(component.name, []).append(component)
+
+    fp.write('{\n' + pad + encoder.encode(cal.name) + ': ')
+    keys = sorted(set(props).union(groups))
+    if not keys:
+        fp.write('{}')
+    else:
+        fp.write('{')
+        for i, key in enumerate(keys):
+            fp.write((',' if i else '') + '\n' + pad * 2)
+            fp.write(encoder.encode(key) + ': ')
+            if key not in groups:
+                _write_encoded(fp, encoder, props[key], 2)
+                continue
 
-            comp_obj = {}
-            for item in component.items():
-                comp_obj[item[0]] = item[1]
+            fp.write('[')
+            for j, component in enumerate(groups[key]):
+                fp.write((',' if j else '') + '\n' + pad * 3)
+                comp_obj = {k: v for k, v in component.items()}
+                _write_encoded(fp, encoder, comp_obj, 3)
+            fp.write('\n' + pad * 2 + ']')
+        fp.write('\n' + pad + '}')
+    fp.write('\n}')
 
-        data[cal.name][component.name].append(comp_obj)
 
-    return json.dumps(data, default=encode_vDDDTypes, sort_keys=True, indent=4)
+def ical2json(cal):
+    fp = io.StringIO()
+    ical2json_stream(cal, fp)
+    return fp.getvalue()
 
 
 def display(cal):
@@ -32,6 +72,6 @@ def display(cal):
 
 def register_property(property_type):
     property_name = property_type.property_name
-    icalendar.cal.types_factory[property_name] = property_type
-    icalendar.cal.types_factory.types_map[property_name] = property_name
+    _TYPES_FACTORY[property_name] = property_type
+    _TYPES_MAP[property_name] = property_name
     return property_type